@@ -1,9 +1,11 @@
 # scripts/add_poverty_to_neighbourhoods.py
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import pandas as pd
+from openpyxl import load_workbook
 
 project_root = Path("/Users/dpro/projects/food_desert")
 
@@ -14,14 +16,18 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
-def read_poverty_from_excel(xlsx_path: Path) -> dict:
-    df = pd.read_excel(xlsx_path, sheet_name=0, header=None, engine="openpyxl")
+def read_poverty_from_excel(xlsx_path: Path) -> tuple:
+    # read_only streams the sheet instead of parsing the whole workbook,
+    # we only need two cells out of it
+    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
 
-    # excel is 1-based, pandas iloc is 0-based
-    # C526 -> row 526, col C -> iloc[525, 2]
-    # C531 -> row 531, col C -> iloc[530, 2]
-    lim_at = df.iloc[525, 2]
-    lico_at = df.iloc[530, 2]
+    # openpyxl cells are 1-based, same as excel
+    # C526 -> row 526, col C -> cell(526, 3)
+    # C531 -> row 531, col C -> cell(531, 3)
+    lim_at = ws.cell(row=526, column=3).value
+    lico_at = ws.cell(row=531, column=3).value
+    wb.close()
 
     def to_float(val):
         if isinstance(val, str):
@@ -36,10 +42,9 @@ def read_poverty_from_excel(xlsx_path: Path) -> dict:
     lim_at_pct = to_float(lim_at)
     lico_at_pct = to_float(lico_at)
 
-    return {
-        "lim_at_pct": lim_at_pct,
-        "lico_at_pct": lico_at_pct,
-    }
+    name = xlsx_path.stem  # file name without extension
+
+    return name, lim_at_pct, lico_at_pct
 
 
 def main() -> None:
@@ -50,21 +55,15 @@ def main() -> None:
 
     neigh_df = pd.read_csv(neigh_csv)
 
-    records = []
+    xlsx_paths = sorted(excel_dir.glob("*.xlsx"))
 
-    for xlsx_path in sorted(excel_dir.glob("*.xlsx")):
-        name = xlsx_path.stem  # file name without extension
-        data = read_poverty_from_excel(xlsx_path)
-        record = {
-            "name": name,
-            "lim_at_pct": data["lim_at_pct"],
-            "lico_at_pct": data["lico_at_pct"],
-        }
-        records.append(record)
+    # each workbook is independent, so spread the parsing across cores
+    with ProcessPoolExecutor() as ex:
+        results = list(ex.map(read_poverty_from_excel, xlsx_paths))
 
-    poverty_df = pd.DataFrame(records)
+    poverty_df = pd.DataFrame(results, columns=["name", "lim_at_pct", "lico_at_pct"])
 
-    merged = neigh_df.merge(poverty_df, on="name", how="left")
+    merged = neigh_df.merge(poverty_df, on="name", how="left", validate="many_to_one")
 
     merged.to_csv(out_csv, index=False)
 
@@ -1,5 +1,6 @@
 # scripts/aggregate_parcels_by_geometry.py
 
+import re
 import sys
 from pathlib import Path
 import pandas as pd
@@ -14,24 +15,53 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
+# Currency/area columns exported with thousands separators and dollar signs
+FORMATTED_NUMERIC_COLS = ['Total Living Area', 'Total Assessed Value', 'Total Proposed Assessment Value']
+FORMATTING_CHARS = re.compile(r'[,$\s]')
+
+
 def load_data(parcels_path: Path, mask_path: Path) -> pd.DataFrame:
     """Load parcels and merge with resident mask."""
     parcels = pd.read_csv(parcels_path, low_memory=False)
-    mask = pd.read_csv(mask_path)
+    mask = pd.read_parquet(mask_path)
     
     # Merge to get residents column and filter to residential parcels only
-    df = parcels.merge(mask[['Roll Number', 'residents']], on='Roll Number', how='inner')
+    df = parcels.merge(
+        mask[['Roll Number', 'residents']], on='Roll Number', how='inner', validate='one_to_one'
+    )
     return df
 
 
 def clean_numeric(series, col_name):
     """Clean numeric columns by removing commas."""
-    if col_name in ['Total Living Area', 'Total Assessed Value', 'Total Proposed Assessment Value']:
-        vals = series.astype(str).str.replace(',', '').str.replace('$', '').str.replace(' ', '').replace('', np.nan)
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    if col_name in FORMATTED_NUMERIC_COLS:
+        vals = series.astype(str).str.replace(FORMATTING_CHARS, '', regex=True).replace('', np.nan)
         return pd.to_numeric(vals, errors='coerce')
     return pd.to_numeric(series, errors='coerce')
 
 
+def join_by_group(group_ids: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Join string values with ', ' per group id, keeping order of appearance.
+
+    Works on sorted numpy slices rather than a per-group Series, groups
+    with no values get NaN.
+    """
+    out = np.full(n_groups, np.nan, dtype=object)
+    if len(values) == 0:
+        return out
+
+    order = np.argsort(group_ids, kind='stable')
+    ids = group_ids[order]
+    vals = values[order]
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    out[ids[starts]] = [', '.join(part) for part in np.split(vals, starts[1:])]
+    return out
+
+
 def aggregate_by_geometry(df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate parcels with identical geometry."""
     
@@ -83,59 +113,64 @@ def aggregate_by_geometry(df: pd.DataFrame) -> pd.DataFrame:
         'Zoning'
     ]
     
-    # Group by geometry
-    grouped = df.groupby('Geometry')
-    
-    results = []
-    
-    for geom, group in grouped:
-        record = {'Geometry': geom}
-        
+    sum_cols = [c for c in sum_cols if c in df.columns]
+    identical_cols = [c for c in identical_cols if c in df.columns]
+    concat_cols = [c for c in concat_cols if c in df.columns]
+
+    # Clean numeric columns once up front rather than inside every group
+    df = df[df['Geometry'].notna()].copy()
+    for col in sum_cols:
+        df[col] = clean_numeric(df[col], col)
+
+    # Encode each distinct WKT string as an integer once, then group on the
+    # codes instead of the long strings; group_ids line up with agg's rows
+    group_ids, geometries = pd.factorize(df['Geometry'], sort=True)
+
+    # Group by geometry, all built-in reductions in a single pass
+    grouped = df.groupby(group_ids)
+
+    named = {
         # Keep first Roll Number (or last - doesn't matter as long as it matches geometry)
-        record['Roll Number'] = group['Roll Number'].iloc[0]
-        
-        # Aggregated roll numbers as CSV string
-        record['aggregated_roll_numbers'] = ', '.join(group['Roll Number'].astype(str))
-        
-        # Count of parcels
-        record['parcel_count'] = len(group)
-        
-        # Sum columns
-        for col in sum_cols:
-            if col in group.columns:
-                vals = clean_numeric(group[col], col)
-                record[col] = vals.sum()
-        
-        # Identical columns - drop if any conflict
-        for col in identical_cols:
-            if col in group.columns:
-                unique_vals = group[col].dropna().unique()
-                if len(unique_vals) == 1:
-                    record[col] = unique_vals[0]
-                elif len(unique_vals) == 0:
-                    record[col] = np.nan
-                # else: don't add to record (will be missing/dropped)
-        
-        # Concatenate columns
-        for col in concat_cols:
-            if col in group.columns:
-                unique_vals = group[col].dropna().astype(str).unique()
-                unique_vals = [v for v in unique_vals if v not in ['', 'nan', 'None']]
-                if len(unique_vals) > 0:
-                    record[col] = ', '.join(unique_vals)
-                else:
-                    record[col] = np.nan
-        
-        results.append(record)
-    
-    result_df = pd.DataFrame(results)
+        'Roll Number': ('Roll Number', 'first'),
+        'parcel_count': ('Roll Number', 'size'),
+    }
+    for col in sum_cols:
+        named[col] = (col, 'sum')
+    for col in identical_cols:
+        named[col] = (col, 'first')
+        named[f'{col}__nunique'] = (col, 'nunique')
+
+    agg = grouped.agg(**named)
+    agg.insert(0, 'Geometry', geometries)
+
+    # Aggregated roll numbers as CSV string
+    roll_numbers = df['Roll Number'].astype(str).to_numpy()
+    agg.insert(
+        2,
+        'aggregated_roll_numbers',
+        join_by_group(group_ids, roll_numbers, len(agg)),
+    )
+
+    # Identical columns - drop if any conflict (first() already skips nulls)
+    for col in identical_cols:
+        nunique = agg.pop(f'{col}__nunique')
+        agg[col] = agg[col].where(nunique == 1)
+
+    # Concatenate unique values, in order of first appearance within each group
+    for col in concat_cols:
+        vals = df[col].astype(str).to_numpy()
+        keep = df[col].notna().to_numpy() & ~np.isin(vals, ['', 'nan', 'None'])
+        pairs = pd.DataFrame({'group_id': group_ids[keep], col: vals[keep]}).drop_duplicates()
+        agg[col] = join_by_group(pairs['group_id'].to_numpy(), pairs[col].to_numpy(), len(agg))
+
+    result_df = agg.reset_index(drop=True)
     return result_df
 
 
 def main() -> None:
     parcels_path = project_root / "data" / "raw" / "Assessment_Parcels_20251112.csv"
-    mask_path = project_root / "data" / "interim" / "parcel_residents_mask.csv"
-    out_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.csv"
+    mask_path = project_root / "data" / "interim" / "parcel_residents_mask.parquet"
+    out_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.parquet"
     
     print("Loading data...")
     df = load_data(parcels_path, mask_path)
@@ -147,7 +182,7 @@ def main() -> None:
     
     print("\nSaving result...")
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    result.to_csv(out_path, index=False)
+    result.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
     print(f"Saved to {out_path}")
 
 
@@ -3,9 +3,12 @@
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import shapely
+from shapely import from_wkt
+from shapely.strtree import STRtree
 
 project_root = Path("/Users/dpro/projects/food_desert")
 
@@ -16,6 +19,17 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
+PARCEL_COLS = ["Roll Number", "Dwelling Units", "Centroid Lat", "Centroid Lon"]
+
+
+def parse_wkt(values: pd.Series) -> np.ndarray:
+    """Parse a WKT column in one vectorized call; blank or missing values become None."""
+    has_wkt = (values.notna() & (values.astype(str).str.strip() != "")).to_numpy()
+    geoms = np.full(len(values), None, dtype=object)
+    geoms[has_wkt] = from_wkt(values[has_wkt].to_numpy())
+    return geoms
+
+
 def clean_dwelling_units(df: pd.DataFrame) -> pd.DataFrame:
     """
     Filter parcels to only those with valid Dwelling Units.
@@ -41,18 +55,19 @@ def clean_dwelling_units(df: pd.DataFrame) -> pd.DataFrame:
 
 def make_parcels_gdf(df: pd.DataFrame) -> gpd.GeoDataFrame:
     if {"Centroid Lat", "Centroid Lon"}.issubset(df.columns):
+        # build the points straight from a contiguous (n, 2) coordinate array
+        xy = np.empty((len(df), 2), dtype=np.float64)
+        xy[:, 0] = df["Centroid Lon"].to_numpy(dtype=np.float64)
+        xy[:, 1] = df["Centroid Lat"].to_numpy(dtype=np.float64)
         gdf = gpd.GeoDataFrame(
             df,
-            geometry=gpd.points_from_xy(df["Centroid Lon"], df["Centroid Lat"]),
-            crs="EPSG:4326",
+            geometry=gpd.GeoSeries(shapely.points(xy), index=df.index, crs="EPSG:4326"),
         )
         return gdf
 
     if "geometry" in df.columns:
         df = df.copy()
-        df["geometry"] = df["geometry"].apply(
-            lambda x: wkt.loads(x) if isinstance(x, str) and x.strip() else None
-        )
+        df["geometry"] = parse_wkt(df["geometry"])
         gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
         return gdf
 
@@ -61,9 +76,9 @@ def make_parcels_gdf(df: pd.DataFrame) -> gpd.GeoDataFrame:
 
 def load_neighbourhoods(path: Path) -> gpd.GeoDataFrame:
     df = pd.read_csv(path)
-    df["geometry"] = df["geometry"].apply(
-        lambda x: wkt.loads(x) if isinstance(x, str) and x.strip() else None
-    )
+    df["geometry"] = parse_wkt(df["geometry"])
+    # ~240 names repeated across every parcel, category keeps them as int codes
+    df["name"] = df["name"].astype("category")
     gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
     return gdf
 
@@ -74,19 +89,30 @@ def attach_neighbourhoods(
     if parcels_gdf.crs != neigh_gdf.crs:
         parcels_gdf = parcels_gdf.to_crs(neigh_gdf.crs)
 
-    neigh_cols = ["neighbourhood_id", "name", "population", "geometry"]
-
-    joined = gpd.sjoin(
-        parcels_gdf,
-        neigh_gdf[neigh_cols],
-        how="left",
-        predicate="within",
+    # one bulk query of the polygons against a tree of the parcel points,
+    # "polygon contains point" is the same test as "point within polygon"
+    # but lets GEOS prepare each polygon once instead of per parcel
+    tree = STRtree(parcels_gdf.geometry.to_numpy())
+    neigh_idx, parcel_idx = tree.query(
+        neigh_gdf.geometry.to_numpy(), predicate="contains"
     )
 
-    joined = joined.drop(columns=["index_right"])
+    # overlapping polygons could match a parcel twice, keep the first hit
+    parcel_idx, first = np.unique(parcel_idx, return_index=True)
+    neigh_idx = neigh_idx[first]
 
-    cols = ["Roll Number", "neighbourhood_id", "name", "population"]
-    joined = joined[cols].copy()
+    # parcels outside every neighbourhood stay NaN, as with a left join
+    match = np.full(len(parcels_gdf), -1, dtype=np.int64)
+    match[parcel_idx] = neigh_idx
+
+    neigh_cols = ["neighbourhood_id", "name", "population"]
+    joined = (
+        neigh_gdf[neigh_cols]
+        .reset_index(drop=True)
+        .reindex(match)
+        .reset_index(drop=True)
+    )
+    joined.insert(0, "Roll Number", parcels_gdf["Roll Number"].to_numpy())
 
     return joined
 
@@ -94,9 +120,9 @@ def attach_neighbourhoods(
 def main() -> None:
     parcels_path = project_root / "data" / "raw" / "Assessment_Parcels_20251112.csv"
     neigh_path = project_root / "data" / "reference" / "neighbourhoods.csv"
-    out_path = project_root / "data" / "interim" / "parcel_neighbourhood_mask.csv"
+    out_path = project_root / "data" / "interim" / "parcel_neighbourhood_mask.parquet"
 
-    parcels_df = pd.read_csv(parcels_path, low_memory=False)
+    parcels_df = pd.read_csv(parcels_path, usecols=PARCEL_COLS, engine="pyarrow")
     parcels_df = clean_dwelling_units(parcels_df)
     parcels_gdf = make_parcels_gdf(parcels_df)
 
@@ -104,7 +130,7 @@ def main() -> None:
 
     mask_df = attach_neighbourhoods(parcels_gdf, neigh_gdf)
 
-    mask_df.to_csv(out_path, index=False)
+    mask_df.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
 
 
 if __name__ == "__main__":
@@ -3,9 +3,12 @@
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import shapely
+from scipy.spatial import cKDTree
+from shapely import from_wkt
 
 project_root = Path("/Users/dpro/projects/food_desert")
 
@@ -16,13 +19,26 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
+# Only the parcel location columns come from the raw assessment file,
+# everything else is already in the residents mask
+PARCEL_COLS = ["Roll Number", "Centroid Lat", "Centroid Lon", "Geometry"]
+
+
+def parse_wkt(values: pd.Series) -> np.ndarray:
+    """Parse a WKT column in one vectorized call; blank or missing values become None."""
+    has_wkt = (values.notna() & (values.astype(str).str.strip() != "")).to_numpy()
+    geoms = np.full(len(values), None, dtype=object)
+    geoms[has_wkt] = from_wkt(values[has_wkt].to_numpy())
+    return geoms
+
+
 def load_parcels_with_residents(
     parcels_path: Path, residents_mask_path: Path
 ) -> pd.DataFrame:
-    raw = pd.read_csv(parcels_path, low_memory=False)
-    mask = pd.read_csv(residents_mask_path)
+    raw = pd.read_csv(parcels_path, usecols=PARCEL_COLS, engine="pyarrow")
+    mask = pd.read_parquet(residents_mask_path)
 
-    df = raw.merge(mask, on="Roll Number", how="inner")
+    df = raw.merge(mask, on="Roll Number", how="inner", validate="one_to_one")
 
     keep_cols = [
         "Roll Number",
@@ -43,21 +59,25 @@ def load_parcels_with_residents(
 
 
 def make_parcel_points(df: pd.DataFrame) -> gpd.GeoDataFrame:
+    """
+    Build parcel points projected to UTM Zone 14N (EPSG:26914), the metric
+    CRS the nearest grocer distances are measured in.
+    """
     df = df.copy()
 
     if {"Centroid Lat", "Centroid Lon"}.issubset(df.columns):
-        gdf = gpd.GeoDataFrame(
-            df,
-            geometry=gpd.points_from_xy(df["Centroid Lon"], df["Centroid Lat"]),
-            crs="EPSG:4326",
-        )
+        # build the points straight from a contiguous (n, 2) coordinate array
+        xy = np.empty((len(df), 2), dtype=np.float64)
+        xy[:, 0] = df["Centroid Lon"].to_numpy(dtype=np.float64)
+        xy[:, 1] = df["Centroid Lat"].to_numpy(dtype=np.float64)
+        points = gpd.GeoSeries(shapely.points(xy), index=df.index, crs="EPSG:4326")
+        gdf = gpd.GeoDataFrame(df, geometry=points.to_crs(epsg=26914))
         return gdf
 
     if "Geometry" in df.columns:
-        df["geometry"] = df["Geometry"].apply(
-            lambda x: wkt.loads(x) if isinstance(x, str) and x.strip() else None
-        )
+        df["geometry"] = parse_wkt(df["Geometry"])
         gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
+        gdf = gdf.to_crs(epsg=26914)
         gdf["geometry"] = gdf.geometry.centroid
         return gdf
 
@@ -65,7 +85,7 @@ def make_parcel_points(df: pd.DataFrame) -> gpd.GeoDataFrame:
 
 
 def load_grocers(path: Path) -> gpd.GeoDataFrame:
-    gdf = gpd.read_file(path)
+    gdf = gpd.read_file(path, engine="pyogrio")
 
     if gdf.crs is None:
         gdf.set_crs(epsg=4326, inplace=True)
@@ -84,34 +104,63 @@ def load_grocers(path: Path) -> gpd.GeoDataFrame:
     gdf = gdf[keep_cols].copy()
     return gdf
 
+def nearest_grocer(
+    px: np.ndarray, py: np.ndarray, gx: np.ndarray, gy: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Nearest grocer for every parcel point, from projected x/y arrays.
+
+    Returns:
+        tuple: (distance to nearest grocer, index of that grocer); parcels
+        without coordinates get NaN and -1
+    """
+    out_d = np.full(px.size, np.nan)
+    out_i = np.full(px.size, -1, dtype=np.int64)
+
+    valid = ~(np.isnan(px) | np.isnan(py))
+    if gx.size == 0 or not valid.any():
+        return out_d, out_i
+
+    # only tens of grocers, so the kd-tree is tiny and each query is a few hops
+    tree = cKDTree(np.column_stack([gx, gy]))
+    dist, idx = tree.query(np.column_stack([px[valid], py[valid]]), k=1)
+
+    out_d[valid] = dist
+    out_i[valid] = idx
+    return out_d, out_i
+
+
 def compute_nearest(
     parcels_gdf: gpd.GeoDataFrame, grocers_gdf: gpd.GeoDataFrame
 ) -> gpd.GeoDataFrame:
-    if parcels_gdf.crs is None:
-        parcels_gdf.set_crs(epsg=4326, inplace=True)
+    # parcels are already in the metric CRS, project grocers straight to it
+    grocers_proj = grocers_gdf.to_crs(parcels_gdf.crs)
 
-    grocers_gdf = grocers_gdf.to_crs(parcels_gdf.crs)
+    # missing/empty points come through as NaN coordinates
+    px = parcels_gdf.geometry.x.to_numpy(dtype=np.float64)
+    py = parcels_gdf.geometry.y.to_numpy(dtype=np.float64)
+    gx = grocers_proj.geometry.x.to_numpy(dtype=np.float64)
+    gy = grocers_proj.geometry.y.to_numpy(dtype=np.float64)
 
-    parcels_proj = parcels_gdf.to_crs(epsg=26914)
-    grocers_proj = grocers_gdf.to_crs(parcels_proj.crs)
+    dist, grocer_idx = nearest_grocer(px, py, gx, gy)
 
-    joined = gpd.sjoin_nearest(
-        parcels_proj,
-        grocers_proj,
-        how="left",
-        distance_col="dist_to_grocer_m",
-    )
+    joined = parcels_gdf.copy()
+    # distances are computed in float64 (UTM northings are ~5.5e6 m, too large
+    # for float32 to difference accurately) but a few km fits float32 to ~1 mm
+    joined["dist_to_grocer_m"] = dist.astype(np.float32)
 
-    joined["dist_to_grocer_m"] = joined["dist_to_grocer_m"].astype(float)
-    joined = joined.drop(columns=["index_right"])
+    grocer_attrs = grocers_proj.drop(columns="geometry").reset_index(drop=True)
+    matched = grocer_attrs.reindex(grocer_idx)  # -1 isn't a label, so NaN row
+    for col in grocer_attrs.columns:
+        joined[col] = matched[col].to_numpy()
 
-    joined = joined.to_crs(parcels_gdf.crs)
+    # no reprojection back to lat/lon, only the attribute columns are written
     return joined
 
 
 def main() -> None:
     parcels_path = project_root / "data" / "raw" / "Assessment_Parcels_20251112.csv"
-    residents_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.csv"
+    residents_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.parquet"
     grocers_path = project_root / "data" / "reference" / "grocers.geojson"
 
     out_mask_csv = (
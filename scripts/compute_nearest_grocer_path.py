@@ -1,14 +1,16 @@
 # scripts/compute_nearest_grocer_path.py
 
+import hashlib
 import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-import networkx as nx
-from shapely import wkt
-from shapely.geometry import Point
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from shapely import from_wkt
 from shapely.strtree import STRtree
 
 project_root = Path("/Users/dpro/projects/food_desert")
@@ -20,12 +22,25 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
+# Only the parcel location columns come from the raw assessment file,
+# everything else is already in the residents mask
+PARCEL_COLS = ["Roll Number", "Centroid Lat", "Centroid Lon", "Geometry"]
+
+
+def parse_wkt(values: pd.Series) -> np.ndarray:
+    """Parse a WKT column in one vectorized call; blank or missing values become None."""
+    has_wkt = (values.notna() & (values.astype(str).str.strip() != "")).to_numpy()
+    geoms = np.full(len(values), None, dtype=object)
+    geoms[has_wkt] = from_wkt(values[has_wkt].to_numpy())
+    return geoms
+
+
 def load_parcels_with_residents(parcels_path: Path,
                                 residents_mask_path: Path) -> pd.DataFrame:
-    raw = pd.read_csv(parcels_path, low_memory=False)
-    mask = pd.read_csv(residents_mask_path)
+    raw = pd.read_csv(parcels_path, usecols=PARCEL_COLS, engine="pyarrow")
+    mask = pd.read_parquet(residents_mask_path)
 
-    df = raw.merge(mask, on="Roll Number", how="inner")
+    df = raw.merge(mask, on="Roll Number", how="inner", validate="one_to_one")
 
     keep_cols = [
         "Roll Number",
@@ -49,17 +64,18 @@ def make_parcel_points(df: pd.DataFrame) -> gpd.GeoDataFrame:
     df = df.copy()
 
     if {"Centroid Lat", "Centroid Lon"}.issubset(df.columns):
+        # build the points straight from a contiguous (n, 2) coordinate array
+        xy = np.empty((len(df), 2), dtype=np.float64)
+        xy[:, 0] = df["Centroid Lon"].to_numpy(dtype=np.float64)
+        xy[:, 1] = df["Centroid Lat"].to_numpy(dtype=np.float64)
         gdf = gpd.GeoDataFrame(
             df,
-            geometry=gpd.points_from_xy(df["Centroid Lon"], df["Centroid Lat"]),
-            crs="EPSG:4326",
+            geometry=gpd.GeoSeries(shapely.points(xy), index=df.index, crs="EPSG:4326"),
         )
         return gdf
 
     if "Geometry" in df.columns:
-        df["geometry"] = df["Geometry"].apply(
-            lambda x: wkt.loads(x) if isinstance(x, str) and x.strip() else None
-        )
+        df["geometry"] = parse_wkt(df["Geometry"])
         gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
         gdf["geometry"] = gdf.geometry.centroid
         return gdf
@@ -68,7 +84,7 @@ def make_parcel_points(df: pd.DataFrame) -> gpd.GeoDataFrame:
 
 
 def load_grocers(path: Path) -> gpd.GeoDataFrame:
-    gdf = gpd.read_file(path)
+    gdf = gpd.read_file(path, engine="pyogrio")
 
     if gdf.crs is None:
         gdf.set_crs(epsg=4326, inplace=True)
@@ -89,99 +105,124 @@ def load_grocers(path: Path) -> gpd.GeoDataFrame:
 
 
 def load_paths(path: Path) -> gpd.GeoDataFrame:
-    paths_gdf = gpd.read_file(path)
+    paths_gdf = gpd.read_file(path, engine="pyogrio")
     if paths_gdf.crs is None:
         paths_gdf.set_crs(epsg=4326, inplace=True)
     return paths_gdf
 
 
-def build_path_graph(paths_gdf: gpd.GeoDataFrame) -> nx.Graph:
-    paths_proj = paths_gdf.to_crs(epsg=26914)
-
-    g = nx.Graph()
-
-    for _, row in paths_proj.iterrows():
-        geom = row.geometry
-        if geom is None or geom.is_empty:
-            continue
-
-        if geom.geom_type == "MultiLineString":
-            lines = geom.geoms
-        else:
-            lines = [geom]
-
-        for line in lines:
-            coords = list(line.coords)
-            if len(coords) < 2:
-                continue
-
-            start = coords[0]
-            end = coords[-1]
-            length = line.length
-
-            u = start
-            v = end
-
-            if u not in g:
-                g.add_node(u, x=u[0], y=u[1])
-            if v not in g:
-                g.add_node(v, x=v[0], y=v[1])
-
-            if u == v:
-                continue
-
-            if g.has_edge(u, v):
-                if length < g[u][v]["weight"]:
-                    g[u][v]["weight"] = length
-            else:
-                g.add_edge(u, v, weight=length)
-
-    return g
+def build_path_graph(paths_gdf: gpd.GeoDataFrame) -> tuple[csr_matrix, np.ndarray]:
+    """
+    Build the road graph as a CSR adjacency over integer node ids.
 
+    Returns:
+        tuple: (csr graph of segment lengths, (n_nodes, 2) array of node x/y)
+    """
+    paths_proj = paths_gdf.to_crs(epsg=26914)
 
-def build_node_index(g: nx.Graph):
-    node_coords = list(g.nodes)
-    points = [Point(x, y) for x, y in node_coords]
-    tree = STRtree(points)
-    return tree, points
+    geoms = paths_proj.geometry.to_numpy()
+    geoms = geoms[~(shapely.is_missing(geoms) | shapely.is_empty(geoms))]
 
+    # explode MultiLineStrings into their parts, single lines pass through
+    lines = shapely.get_parts(geoms)
+    lines = lines[shapely.get_num_coordinates(lines) >= 2]
 
-def nearest_node_for_geom(geom, tree: STRtree, points):
-    if geom is None or geom.is_empty:
-        return None
+    starts = shapely.get_coordinates(shapely.get_point(lines, 0))
+    ends = shapely.get_coordinates(shapely.get_point(lines, -1))
+    lengths = shapely.length(lines)
 
-    idx = tree.nearest(geom)
+    # every distinct endpoint becomes a node, ids index into node_xy
+    node_xy, node_ids = np.unique(
+        np.concatenate([starts, ends]), axis=0, return_inverse=True
+    )
+    node_ids = node_ids.ravel()
+    u = node_ids[: len(lines)]
+    v = node_ids[len(lines):]
+
+    # undirected edges, skip self loops and keep the shortest parallel segment
+    keep = u != v
+    u, v, lengths = np.minimum(u, v)[keep], np.maximum(u, v)[keep], lengths[keep]
+    order = np.lexsort((lengths, v, u))
+    u, v, lengths = u[order], v[order], lengths[order]
+    first = np.ones(len(u), dtype=bool)
+    first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+
+    n = len(node_xy)
+    g = csr_matrix((lengths[first], (u[first], v[first])), shape=(n, n))
+    return g, node_xy
+
+
+def load_path_graph(paths_path: Path, cache_dir: Path) -> tuple[csr_matrix, np.ndarray]:
+    """
+    Load the road graph from the on-disk cache, building it on a miss.
+
+    The cache file is keyed by a hash of the road network file, so a new
+    download rebuilds the graph and replaces the stale cache.
+    """
+    key = hashlib.sha1(paths_path.read_bytes()).hexdigest()[:12]
+    cache_path = cache_dir / f"road_graph_{key}.npz"
+
+    if cache_path.exists():
+        with np.load(cache_path) as cached:
+            node_xy = cached["node_xy"]
+            n = len(node_xy)
+            g = csr_matrix(
+                (cached["weights"], cached["indices"], cached["indptr"]), shape=(n, n)
+            )
+        return g, node_xy
+
+    g, node_xy = build_path_graph(load_paths(paths_path))
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob("road_graph_*.npz"):
+        stale.unlink()
+    np.savez_compressed(
+        cache_path,
+        indptr=g.indptr,
+        indices=g.indices,
+        weights=g.data,
+        node_xy=node_xy,
+    )
+    return g, node_xy
 
-    # shapely STRtree can return an index (int) or a geometry
-    if isinstance(idx, (int, np.integer)):
-        pt = points[int(idx)]
-    else:
-        pt = idx
 
-    return (pt.x, pt.y)
+def build_node_index(node_xy: np.ndarray) -> STRtree:
+    return STRtree(shapely.points(node_xy))
 
 
 def assign_nearest_nodes(points_gdf: gpd.GeoDataFrame,
                          tree: STRtree,
-                         points,
                          col_name: str) -> gpd.GeoDataFrame:
     gdf = points_gdf.copy()
-    gdf[col_name] = gdf.geometry.apply(
-        lambda geom: nearest_node_for_geom(geom, tree, points)
+
+    # one bulk query for every point; missing/empty geometries get no match
+    input_idx, tree_idx = tree.query_nearest(
+        gdf.geometry.to_numpy(), all_matches=False
     )
+
+    # node ids line up with the tree order, -1 marks points that didn't snap
+    nearest = np.full(len(gdf), -1, dtype=np.int64)
+    nearest[input_idx] = tree_idx
+
+    gdf[col_name] = nearest
     return gdf
 
 
-def compute_node_distances(g: nx.Graph, source_nodes: list[tuple[float, float]]):
-    dist = nx.multi_source_dijkstra_path_length(g, source_nodes, weight="weight")
+def compute_node_distances(g: csr_matrix, source_nodes: np.ndarray) -> np.ndarray:
+    # min_only gives the distance to the closest source for every node
+    dist = dijkstra(g, directed=False, indices=source_nodes, min_only=True)
+
+    # unreachable nodes come back as inf
+    dist[~np.isfinite(dist)] = np.nan
     return dist
 
 
 def main() -> None:
     parcels_path = project_root / "data" / "raw" / "Assessment_Parcels_20251112.csv"
-    residents_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.csv"
+    residents_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.parquet"
     grocers_path = project_root / "data" / "reference" / "grocers.geojson"
     paths_path = project_root / "data" / "reference" / "Road_Network_20251112.geojson"
+    graph_cache_dir = project_root / "data" / "cache"
 
     out_mask_csv = (
         project_root / "data" / "interim" / "parcel_nearest_grocer_path_mask.csv"
@@ -191,31 +232,30 @@ def main() -> None:
     parcels_gdf = make_parcel_points(parcels_df)
 
     grocers_gdf = load_grocers(grocers_path)
-    paths_gdf = load_paths(paths_path)
 
     parcels_proj = parcels_gdf.to_crs(epsg=26914)
     grocers_proj = grocers_gdf.to_crs(epsg=26914)
 
-    path_graph = build_path_graph(paths_gdf)
+    path_graph, node_xy = load_path_graph(paths_path, graph_cache_dir)
 
-    tree, points = build_node_index(path_graph)
+    tree = build_node_index(node_xy)
 
-    parcels_proj = assign_nearest_nodes(parcels_proj, tree, points, "path_node")
-    grocers_proj = assign_nearest_nodes(grocers_proj, tree, points, "path_node")
+    parcels_proj = assign_nearest_nodes(parcels_proj, tree, "path_node")
+    grocers_proj = assign_nearest_nodes(grocers_proj, tree, "path_node")
 
-    grocer_nodes = (
-        grocers_proj["path_node"]
-        .dropna()
-        .drop_duplicates()
-        .tolist()
-    )
+    grocer_nodes = grocers_proj["path_node"].to_numpy()
+    grocer_nodes = np.unique(grocer_nodes[grocer_nodes >= 0])
 
-    if not grocer_nodes:
+    if grocer_nodes.size == 0:
         raise ValueError("no grocer path nodes snapped; check CRS / path data")
 
     node_dist = compute_node_distances(path_graph, grocer_nodes)
 
-    parcels_proj["dist_to_grocer_path_m"] = parcels_proj["path_node"].map(node_dist)
+    parcel_nodes = parcels_proj["path_node"].to_numpy()
+    # stored as float32, path lengths of a few km keep ~1 mm precision
+    parcels_proj["dist_to_grocer_path_m"] = np.where(
+        parcel_nodes >= 0, node_dist[parcel_nodes], np.nan
+    ).astype(np.float32)
 
     result = pd.DataFrame(parcels_proj.drop(columns="geometry"))
 
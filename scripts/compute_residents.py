@@ -1,6 +1,8 @@
 # scripts/compute_residents.py
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import numpy as np
@@ -36,36 +38,64 @@ RENTED_CODES = [
 # All other codes default to RENTED behavior
 DEFAULT_TENURE = 'rented'
 
+TENURE_BY_CODE = {
+    **{code: 'owned' for code in OWNED_CODES},
+    **{code: 'rented' for code in RENTED_CODES},
+}
+
+# CMHC household size categories, in order of household size
+HOUSEHOLD_CATEGORIES = [
+    'One-person household',
+    'Two-person household',
+    'Three-person household',
+    'Four-person household',
+    'Five-or-more-person household',
+]
+HOUSEHOLD_SIZES = np.arange(1, 6)
+
+# Raw assessment columns used here, Total Living Area is passed through
+# to the output for downstream scripts
+PARCEL_COLS = ["Roll Number", "Property Use Code", "Dwelling Units", "Total Living Area"]
+
+# Roll Number stays int64 to match the mask, the ~100 use codes are
+# stored once as categories
+PARCEL_DTYPES = {"Roll Number": "int64", "Property Use Code": "category"}
+
 
 def load_household_distribution(csv_path: Path) -> pd.DataFrame:
     """
     Load CMHC household size distribution data.
     """
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, engine="pyarrow")
     return df
 
 
 def load_and_classify_parcels(
     parcels_path: Path, mask_path: Path, household_dist_path: Path
-) -> tuple[pd.DataFrame, pd.DataFrame]:
+) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
     """
     Load parcels, apply mask, and classify as owned/rented.
     
     Returns:
-        tuple: (parcels_df with tenure classification, household_dist_df)
+        tuple: (parcels_df with tenure classification, owner household size
+        fractions, renter household size fractions), the fractions ordered
+        as HOUSEHOLD_CATEGORIES
     """
-    raw = pd.read_csv(parcels_path, low_memory=False)
-    mask = pd.read_csv(mask_path)
+    raw = pd.read_csv(
+        parcels_path, usecols=PARCEL_COLS, dtype=PARCEL_DTYPES, engine="pyarrow"
+    )
+    mask = pd.read_parquet(mask_path)
     household_dist = load_household_distribution(household_dist_path)
 
     # Inner join keeps only roll numbers in the mask
-    df = raw.merge(mask, on="Roll Number", how="inner")
+    df = raw.merge(mask, on="Roll Number", how="inner", validate="one_to_one")
 
     # Keep only columns needed for residents work
     keep_cols = [
         "Roll Number",
         "Property Use Code",
         "Dwelling Units",
+        "Total Living Area",
         "neighbourhood_id",
         "name",
         "population",
@@ -76,26 +106,28 @@ def load_and_classify_parcels(
     # Clean Dwelling Units
     df["Dwelling Units"] = pd.to_numeric(df["Dwelling Units"], errors="coerce")
 
-    # Classify tenure
-    def classify_tenure(code):
-        if code in OWNED_CODES:
-            return 'owned'
-        elif code in RENTED_CODES:
-            return 'rented'
-        else:
-            return DEFAULT_TENURE
+    # Classify tenure with one hash lookup per row, unlisted codes default
+    df['tenure'] = (
+        df['Property Use Code']
+        .map(TENURE_BY_CODE)
+        .fillna(DEFAULT_TENURE)
+        .astype(pd.CategoricalDtype(['owned', 'rented']))
+    )
 
-    df['tenure'] = df['Property Use Code'].apply(classify_tenure)
+    # Household size distributions from CMHC data, one value per size
+    dist = household_dist.set_index('Category')
+    own_pct = dist.loc[HOUSEHOLD_CATEGORIES, 'Owners_Pct'].to_numpy() / 100
+    rent_pct = dist.loc[HOUSEHOLD_CATEGORIES, 'Renters_Pct'].to_numpy() / 100
 
-    return df, household_dist
+    return df, own_pct, rent_pct
 
 
 def allocate_residents_to_neighbourhood(
-    parcels: pd.DataFrame, household_dist: pd.DataFrame, neighbourhood_id: int
+    neigh_parcels: pd.DataFrame, own_pct: np.ndarray, rent_pct: np.ndarray
 ) -> pd.DataFrame:
     """
-    Allocate residents to parcels within a single neighbourhood using
-    CMHC household size distributions.
+    Allocate residents to the parcels of a single neighbourhood (one
+    neighbourhood_id group) using CMHC household size distributions.
     
     Algorithm:
     1. Calculate raw population using city-wide household size percentages
@@ -104,11 +136,8 @@ def allocate_residents_to_neighbourhood(
     4. Assign residents by drawing from pools proportional to dwelling units
     5. Ensure minimum 1 resident per parcel
     """
-    neigh_parcels = parcels[parcels['neighbourhood_id'] == neighbourhood_id].copy()
-    
-    if len(neigh_parcels) == 0:
-        return neigh_parcels
-    
+    neigh_parcels = neigh_parcels.copy()
+
     census_pop = neigh_parcels['population'].iloc[0]
 
     # If population is 0 or less, set all residents to 0 and return
@@ -123,184 +152,120 @@ def allocate_residents_to_neighbourhood(
     total_owned_units = owned['Dwelling Units'].sum()
     total_rented_units = rented['Dwelling Units'].sum()
     
-    # Get household size distributions from CMHC data
-    dist = household_dist.set_index('Category')
-    
     # Calculate raw populations using percentages
-    # For owned units
-    own1_raw = (dist.loc['One-person household', 'Owners_Pct'] / 100) * total_owned_units * 1
-    own2_raw = (dist.loc['Two-person household', 'Owners_Pct'] / 100) * total_owned_units * 2
-    own3_raw = (dist.loc['Three-person household', 'Owners_Pct'] / 100) * total_owned_units * 3
-    own4_raw = (dist.loc['Four-person household', 'Owners_Pct'] / 100) * total_owned_units * 4
-    own5_raw = (dist.loc['Five-or-more-person household', 'Owners_Pct'] / 100) * total_owned_units * 5
-    
-    # For rented units
-    rent1_raw = (dist.loc['One-person household', 'Renters_Pct'] / 100) * total_rented_units * 1
-    rent2_raw = (dist.loc['Two-person household', 'Renters_Pct'] / 100) * total_rented_units * 2
-    rent3_raw = (dist.loc['Three-person household', 'Renters_Pct'] / 100) * total_rented_units * 3
-    rent4_raw = (dist.loc['Four-person household', 'Renters_Pct'] / 100) * total_rented_units * 4
-    rent5_raw = (dist.loc['Five-or-more-person household', 'Renters_Pct'] / 100) * total_rented_units * 5
-    
-    total_raw = own1_raw + own2_raw + own3_raw + own4_raw + own5_raw + \
-                rent1_raw + rent2_raw + rent3_raw + rent4_raw + rent5_raw
-    
+    own_raw = own_pct * total_owned_units * HOUSEHOLD_SIZES
+    rent_raw = rent_pct * total_rented_units * HOUSEHOLD_SIZES
+
+    total_raw = own_raw.sum() + rent_raw.sum()
+
     # Scale to match census population
     scaling_factor = census_pop / total_raw if total_raw > 0 else 0
+
+    own_pop = own_raw * scaling_factor
+    rent_pop = rent_raw * scaling_factor
     
-    own1_pop = own1_raw * scaling_factor
-    own2_pop = own2_raw * scaling_factor
-    own3_pop = own3_raw * scaling_factor
-    own4_pop = own4_raw * scaling_factor
-    own5_pop = own5_raw * scaling_factor
-    
-    rent1_pop = rent1_raw * scaling_factor
-    rent2_pop = rent2_raw * scaling_factor
-    rent3_pop = rent3_raw * scaling_factor
-    rent4_pop = rent4_raw * scaling_factor
-    rent5_pop = rent5_raw * scaling_factor
-    
-    # Convert populations to dwelling unit counts
-    def pop_to_units_with_rounding(pop, household_size, total_units):
-        """
-        Convert population to number of dwelling units with proper rounding.
-        Uses remainder distribution to ensure exact match to total units.
-        """
-        exact_units = pop / household_size
-        base_units = int(exact_units)
-        return base_units, exact_units - base_units
-    
-    # Calculate base units and remainders
-    owned_allocations = [
-        pop_to_units_with_rounding(own1_pop, 1, total_owned_units),
-        pop_to_units_with_rounding(own2_pop, 2, total_owned_units),
-        pop_to_units_with_rounding(own3_pop, 3, total_owned_units),
-        pop_to_units_with_rounding(own4_pop, 4, total_owned_units),
-        pop_to_units_with_rounding(own5_pop, 5, total_owned_units),
-    ]
-    
-    rented_allocations = [
-        pop_to_units_with_rounding(rent1_pop, 1, total_rented_units),
-        pop_to_units_with_rounding(rent2_pop, 2, total_rented_units),
-        pop_to_units_with_rounding(rent3_pop, 3, total_rented_units),
-        pop_to_units_with_rounding(rent4_pop, 4, total_rented_units),
-        pop_to_units_with_rounding(rent5_pop, 5, total_rented_units),
-    ]
+    # Convert populations to dwelling unit counts, keeping the fractional
+    # remainders for rounding
+    own_exact = own_pop / HOUSEHOLD_SIZES
+    rent_exact = rent_pop / HOUSEHOLD_SIZES
+    own_base = own_exact.astype(np.int64)
+    rent_base = rent_exact.astype(np.int64)
     
     # Distribute remainders
-    def distribute_remainders(allocations, target_total):
+    def distribute_remainders(base_units, remainders, target_total):
         """
         Distribute remainder dwelling units based on fractional parts.
         """
-        base_units = [alloc[0] for alloc in allocations]
-        remainders = [alloc[1] for alloc in allocations]
-        
-        current_total = sum(base_units)
-        needed = int(target_total - current_total)
+        base_units = base_units.copy()
+        needed = min(int(target_total - base_units.sum()), len(base_units))
         
-        # Sort by remainder (largest first) and add units
-        sorted_indices = np.argsort(remainders)[::-1]
-        
-        for i in range(min(needed, len(sorted_indices))):
-            idx = sorted_indices[i]
+        # Add one unit to each of the largest remainders in a single step
+        if needed > 0:
+            idx = np.argpartition(-remainders, needed - 1)[:needed]
             base_units[idx] += 1
         
         return base_units
     
-    owned_units = distribute_remainders(owned_allocations, total_owned_units)
-    rented_units = distribute_remainders(rented_allocations, total_rented_units)
-    
-    # Create household size pools
-    owned_pool = (
-        [1] * owned_units[0] +
-        [2] * owned_units[1] +
-        [3] * owned_units[2] +
-        [4] * owned_units[3] +
-        [5] * owned_units[4]
-    )
-    
-    rented_pool = (
-        [1] * rented_units[0] +
-        [2] * rented_units[1] +
-        [3] * rented_units[2] +
-        [4] * rented_units[3] +
-        [5] * rented_units[4]
-    )
-    
-    # Shuffle pools
-    np.random.seed(42)  # Reproducible
-    np.random.shuffle(owned_pool)
-    np.random.shuffle(rented_pool)
-    
-    # Assign residents to parcels
-    owned_idx = 0
-    rented_idx = 0
-    
-    residents_list = []
-    
-    for _, parcel in neigh_parcels.iterrows():
-        du = int(parcel['Dwelling Units'])
-        tenure = parcel['tenure']
-        
-        if tenure == 'owned' and owned_idx < len(owned_pool):
-            end_idx = min(owned_idx + du, len(owned_pool))
-            household_sizes = owned_pool[owned_idx:end_idx]
-            residents = sum(household_sizes)
-            owned_idx = end_idx
-        elif tenure == 'rented' and rented_idx < len(rented_pool):
-            end_idx = min(rented_idx + du, len(rented_pool))
-            household_sizes = rented_pool[rented_idx:end_idx]
-            residents = sum(household_sizes)
-            rented_idx = end_idx
-        else:
-            # Shouldn't happen if pools sized correctly, but fallback
-            residents = 0  # No residents if pools exhausted
-        
-        residents_list.append(residents)
-    
-    neigh_parcels['residents'] = residents_list
+    owned_units = distribute_remainders(own_base, own_exact - own_base, total_owned_units)
+    rented_units = distribute_remainders(rent_base, rent_exact - rent_base, total_rented_units)
+    
+    # Create household size pools (sizes 1-5 fit in int8), shuffled with a
+    # generator seeded per neighbourhood so results don't depend on
+    # processing order. Only ranged sums of each pool are needed below, so
+    # just its prefix sums are kept
+    pool_sizes = HOUSEHOLD_SIZES.astype(np.int8)
+    rng = np.random.default_rng(42)  # Reproducible
+    pool_cumsums = {}
+    for tenure_value, units in (('owned', owned_units), ('rented', rented_units)):
+        pool = np.repeat(pool_sizes, units)
+        rng.shuffle(pool)
+        pool_cumsum = np.zeros(len(pool) + 1, dtype=np.int32)
+        np.cumsum(pool, dtype=np.int32, out=pool_cumsum[1:])
+        pool_cumsums[tenure_value] = pool_cumsum
+    
+    # Assign residents to parcels: each tenure's parcels take consecutive
+    # runs of their pool in row order, so a parcel's residents are the
+    # difference of two prefix sums. Parcels past the end of the pool get 0
+    # (shouldn't happen if pools sized correctly)
+    du = neigh_parcels['Dwelling Units'].to_numpy().astype(np.int64)
+    tenure = neigh_parcels['tenure'].to_numpy()
+    residents = np.zeros(len(neigh_parcels), dtype=np.int64)
+    
+    for tenure_value, pool_cumsum in pool_cumsums.items():
+        is_tenure = tenure == tenure_value
+        units = du[is_tenure]
+        pool_len = len(pool_cumsum) - 1
+        offsets = np.cumsum(units)
+        starts = np.minimum(offsets - units, pool_len)
+        ends = np.minimum(offsets, pool_len)
+        residents[is_tenure] = pool_cumsum[ends] - pool_cumsum[starts]
     
     # Ensure minimum 1 resident per parcel (only if neighbourhood has population)
     if census_pop > 0:
-        neigh_parcels.loc[neigh_parcels['residents'] == 0, 'residents'] = 1
+        residents[residents == 0] = 1
     
     # Adjust if total doesn't match census (due to rounding or minimum enforcement)
-    total_assigned = neigh_parcels['residents'].sum()
-    diff = int(census_pop - total_assigned)
+    diff = int(census_pop - residents.sum())
     
     if diff != 0:
-        # Sort by residents (descending for removal, ascending for addition)
-        sorted_parcels = neigh_parcels.sort_values('residents', ascending=(diff > 0))
+        # Smallest parcels for addition, largest for removal; only the top k
+        # are needed so partition rather than sort
+        k = min(abs(diff), len(residents))
+        pick = np.argpartition(residents if diff > 0 else -residents, k - 1)[:k]
         
-        abs_diff = abs(diff)
-        for i in range(min(abs_diff, len(sorted_parcels))):
-            idx = sorted_parcels.index[i]
-            if diff > 0:
-                neigh_parcels.loc[idx, 'residents'] += 1
-            elif diff < 0 and neigh_parcels.loc[idx, 'residents'] > 1:
-                neigh_parcels.loc[idx, 'residents'] -= 1
+        if diff > 0:
+            residents[pick] += 1
+        else:
+            residents[pick[residents[pick] > 1]] -= 1
+    
+    neigh_parcels['residents'] = residents
     
     return neigh_parcels
 
 
 def main() -> None:
     parcels_path = project_root / "data" / "raw" / "Assessment_Parcels_20251112.csv"
-    mask_path = project_root / "data" / "interim" / "parcel_neighbourhood_mask.csv"
+    mask_path = project_root / "data" / "interim" / "parcel_neighbourhood_mask.parquet"
     household_dist_path = project_root / "data" / "reference" / "winnipeg_household_data_2021.csv"
-    out_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.csv"
+    out_mask_path = project_root / "data" / "interim" / "parcel_residents_mask.parquet"
 
-    parcels_df, household_dist = load_and_classify_parcels(
+    parcels_df, own_pct, rent_pct = load_and_classify_parcels(
         parcels_path, mask_path, household_dist_path
     )
 
-    # Process each neighbourhood
-    all_results = []
-    
-    for neighbourhood_id in parcels_df['neighbourhood_id'].unique():
-        if pd.notna(neighbourhood_id):
-            result = allocate_residents_to_neighbourhood(
-                parcels_df, household_dist, neighbourhood_id
-            )
-            all_results.append(result)
+    # Process each neighbourhood; groupby splits the table once (and skips
+    # parcels without a neighbourhood) instead of re-filtering per id.
+    # Neighbourhoods are independent and seeded separately, so only each
+    # slice (plus the two 5-value distributions) is shipped to a worker
+    neigh_groups = [g for _, g in parcels_df.groupby('neighbourhood_id', sort=False)]
+    with ProcessPoolExecutor() as ex:
+        all_results = list(ex.map(
+            allocate_residents_to_neighbourhood,
+            neigh_groups,
+            repeat(own_pct),
+            repeat(rent_pct),
+            chunksize=16,
+        ))
     
     # Combine all neighbourhoods
     final_df = pd.concat(all_results, ignore_index=True)
@@ -315,17 +280,10 @@ def main() -> None:
         "Dwelling Units",
         "residents",
     ]
-    
-    # Add Total Living Area from original if needed for downstream compatibility
-    if "Total Living Area" not in final_df.columns:
-        raw = pd.read_csv(parcels_path, low_memory=False)
-        tla_map = raw[['Roll Number', 'Total Living Area']].drop_duplicates()
-        final_df = final_df.merge(tla_map, on='Roll Number', how='left')
-    
     out_cols = [c for c in out_cols if c in final_df.columns]
     final_df = final_df[out_cols].copy()
     
-    final_df.to_csv(out_mask_path, index=False)
+    final_df.to_parquet(out_mask_path, engine="pyarrow", compression="zstd", index=False)
 
 
 if __name__ == "__main__":
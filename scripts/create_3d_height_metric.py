@@ -4,7 +4,7 @@ import sys
 from pathlib import Path
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+from shapely import from_wkt
 import numpy as np
 
 project_root = Path("/Users/dpro/projects/food_desert")
@@ -16,14 +16,20 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
-def load_aggregated_parcels(csv_path: Path) -> gpd.GeoDataFrame:
+def parse_wkt(values: pd.Series) -> np.ndarray:
+    """Parse a WKT column in one vectorized call; blank or missing values become None."""
+    has_wkt = (values.notna() & (values.astype(str).str.strip() != "")).to_numpy()
+    geoms = np.full(len(values), None, dtype=object)
+    geoms[has_wkt] = from_wkt(values[has_wkt].to_numpy())
+    return geoms
+
+
+def load_aggregated_parcels(parquet_path: Path) -> gpd.GeoDataFrame:
     """Load aggregated parcels and convert to GeoDataFrame."""
-    df = pd.read_csv(csv_path)
+    df = pd.read_parquet(parquet_path)
     
     # Parse WKT geometry
-    df['geometry'] = df['Geometry'].apply(
-        lambda x: wkt.loads(x) if isinstance(x, str) and x.strip() else None
-    )
+    df['geometry'] = parse_wkt(df['Geometry'])
     
     # Create GeoDataFrame
     gdf = gpd.GeoDataFrame(df, geometry='geometry', crs='EPSG:4326')
@@ -42,40 +48,47 @@ def calculate_area_and_height_metric(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     
     # Reproject to UTM Zone 14N (EPSG:26914) for accurate area calculation
     # Winnipeg is in UTM Zone 14N
-    gdf_proj = gdf.to_crs(epsg=26914)
-    
-    # Calculate area in square meters
-    gdf['area_m2'] = gdf_proj.geometry.area
+    # Calculate area in square meters, projecting only the geometry column
+    # rather than copying every attribute column along with it
+    gdf['area_m2'] = gdf.geometry.to_crs(epsg=26914).area
     
     # Calculate height metric: residents per square meter
-    # This will be very small, so we'll also create scaled versions
-    gdf['resident_density'] = gdf['residents'] / gdf['area_m2']
+    # This will be very small, so we'll also create scaled versions.
+    # Worked on plain float64 arrays so each metric is one pass with no
+    # intermediate Series
+    residents = gdf['residents'].to_numpy(dtype=np.float64, na_value=np.nan)
+    area = gdf['area_m2'].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = residents / area
     
     # Handle division by zero or missing area
-    gdf['resident_density'] = gdf['resident_density'].replace([np.inf, -np.inf], np.nan)
+    density[np.isinf(density)] = np.nan
+    gdf['resident_density'] = density
     
     # Create scaled versions for visualization
     # Scale 1: multiply by 100 (residents per 100 m²)
-    gdf['height_metric_100m2'] = gdf['resident_density'] * 100
+    gdf['height_metric_100m2'] = density * 100
     
     # Scale 2: multiply by 1000 (residents per 1000 m²)
-    gdf['height_metric_1000m2'] = gdf['resident_density'] * 1000
+    density_1000 = density * 1000
+    gdf['height_metric_1000m2'] = density_1000
     
     # Scale 3: square root transformation to compress extreme values
-    gdf['height_metric_sqrt'] = np.sqrt(gdf['resident_density'] * 1000)
+    gdf['height_metric_sqrt'] = np.sqrt(density_1000)
     
     # Scale 4: log transformation (good for wide range compression)
-    # Add 1 to avoid log(0)
-    gdf['height_metric_log'] = np.log10((gdf['resident_density'] * 1000) + 1)
+    # Add 1 to avoid log(0), reusing a single scratch array
+    scratch = density_1000 + 1
+    gdf['height_metric_log'] = np.log10(scratch, out=scratch)
     
     return gdf
 
 
 def main() -> None:
-    agg_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.csv"
+    agg_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.parquet"
     
     # Output paths
-    out_csv = project_root / "data" / "processed" / "aggregated_parcels_3d_ready.csv"
+    out_parquet = project_root / "data" / "processed" / "aggregated_parcels_3d_ready.parquet"
     out_geojson = project_root / "data" / "processed" / "aggregated_parcels_3d_ready.geojson"
     out_shp = project_root / "data" / "processed" / "aggregated_parcels_3d_ready.shp"
     
@@ -114,13 +127,12 @@ def main() -> None:
     
     print("\nSaving outputs...")
     
-    # CSV (drop geometry for cleaner CSV)
-    csv_df = gdf.drop(columns=['geometry'])
-    csv_df.to_csv(out_csv, index=False)
-    print(f"  CSV:     {out_csv}")
+    # GeoParquet (columnar, keeps geometry; replaces the attribute-only CSV)
+    gdf.to_parquet(out_parquet, compression='zstd', index=False)
+    print(f"  Parquet: {out_parquet}")
     
     # GeoJSON (for web mapping or QGIS)
-    gdf.to_file(out_geojson, driver='GeoJSON')
+    gdf.to_file(out_geojson, driver='GeoJSON', engine='pyogrio')
     print(f"  GeoJSON: {out_geojson}")
     
     # Shapefile (for ArcGIS Pro)
@@ -135,7 +147,7 @@ def main() -> None:
         'aggregated_roll_numbers': 'agg_rolls',
         'neighbourhood_id': 'neigh_id'
     })
-    gdf_shp.to_file(out_shp, driver='ESRI Shapefile')
+    gdf_shp.to_file(out_shp, driver='ESRI Shapefile', engine='pyogrio')
     print(f"  Shapefile: {out_shp}")
     
     print("\n" + "=" * 70)
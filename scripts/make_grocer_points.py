@@ -3,9 +3,12 @@
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 import folium
+from folium.plugins import FastMarkerCluster
 
 project_root = Path("/Users/dpro/projects/food_desert")
 
@@ -16,16 +19,29 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
-def build_working_csv(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+# Leaflet marker factory for FastMarkerCluster, same look as the old
+# per-row CircleMarkers (radius 4, filled, name in the popup)
+CIRCLE_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {radius: 4, fill: true});
+    marker.bindPopup(row[2]);
+    return marker;
+};
+"""
+
+
+def coerce_lon_lat(lon: pd.Series, lat: pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Coerce lon/lat to plain float64 arrays; returns (lon, lat, valid mask)."""
+    lon = pd.to_numeric(lon, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    lat = pd.to_numeric(lat, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return lon, lat, ~(np.isnan(lon) | np.isnan(lat))
+
 
+def build_working_csv(df: pd.DataFrame) -> pd.DataFrame:
     if not {"X", "Y"}.issubset(df.columns):
         raise ValueError(f"expected X and Y columns, got: {list(df.columns)}")
 
-    df["lon"] = pd.to_numeric(df["X"], errors="coerce")
-    df["lat"] = pd.to_numeric(df["Y"], errors="coerce")
-
-    df = df[df["lon"].notna() & df["lat"].notna()].copy()
+    lon, lat, valid = coerce_lon_lat(df["X"], df["Y"])
 
     cols = [
         "name",
@@ -39,32 +55,46 @@ def build_working_csv(df: pd.DataFrame) -> pd.DataFrame:
         "lon",
         "lat",
     ]
-    cols = [c for c in cols if c in df.columns]
-    df = df[cols].copy()
+    # select and filter in one copy, lon/lat are added from the arrays
+    cols = [c for c in cols if c in df.columns and c not in ("lon", "lat")]
+    df = df.loc[valid, cols]
+    df["lon"] = lon[valid]
+    df["lat"] = lat[valid]
 
     return df
 
 
 def csv_to_geodataframe(csv_path: Path) -> gpd.GeoDataFrame:
-    df = pd.read_csv(csv_path)
+    return dataframe_to_geodataframe(pd.read_csv(csv_path))
+
 
+def dataframe_to_geodataframe(df: pd.DataFrame) -> gpd.GeoDataFrame:
     # Add a simple surrogate key if one doesn't already exist
     if "grocer_id" not in df.columns:
         df = df.reset_index(drop=True)
         df.insert(0, "grocer_id", df.index + 1)  # 1,2,3,...
 
-    df["lon"] = pd.to_numeric(df["lon"], errors="coerce")
-    df["lat"] = pd.to_numeric(df["lat"], errors="coerce")
-    df = df[df["lon"].notna() & df["lat"].notna()].copy()
+    lon, lat, valid = coerce_lon_lat(df["lon"], df["lat"])
+    df = df.loc[valid]
+    df["lon"] = lon[valid]
+    df["lat"] = lat[valid]
 
     gdf = gpd.GeoDataFrame(
         df,
-        geometry=gpd.points_from_xy(df["lon"], df["lat"]),
+        geometry=shapely.points(lon[valid], lat[valid]),
         crs="EPSG:4326",
     )
     return gdf
 
 
+def popup_names(gdf: gpd.GeoDataFrame) -> pd.Series:
+    """store_name, falling back to name then "", for every row at once."""
+    missing = pd.Series(np.nan, index=gdf.index, dtype=object)
+    store_name = gdf.get("store_name", missing)
+    store_name = store_name.where(store_name.astype(str).str.strip() != "")
+    return store_name.fillna(gdf.get("name", missing)).fillna("").astype(str)
+
+
 def make_folium_map(gdf: gpd.GeoDataFrame, html_path: Path) -> None:
     if gdf.empty:
         raise ValueError("no grocers to map")
@@ -74,19 +104,28 @@ def make_folium_map(gdf: gpd.GeoDataFrame, html_path: Path) -> None:
 
     m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
 
-    for _, row in gdf.iterrows():
-        name = row.get("store_name") or row.get("name") or ""
-        popup_text = f"{name}"
-        folium.CircleMarker(
-            location=[row["lat"], row["lon"]],
-            radius=4,
-            fill=True,
-            popup=popup_text,
-        ).add_to(m)
+    # one JS array of [lat, lon, name] rows, markers are built and clustered
+    # client-side instead of one CircleMarker object per grocer
+    names = popup_names(gdf)
+    data = list(zip(gdf["lat"].tolist(), gdf["lon"].tolist(), names.tolist()))
+    FastMarkerCluster(data, callback=CIRCLE_MARKER_CALLBACK).add_to(m)
 
     m.save(str(html_path))
 
 
+def write_if_changed(path: Path, data: bytes) -> None:
+    """Write data to path unless the file already holds exactly these bytes."""
+    if path.exists() and path.read_bytes() == data:
+        return
+    path.write_bytes(data)
+
+
+def is_stale(outputs: tuple[Path, ...], source: Path) -> bool:
+    """True if any output is missing or older than source."""
+    source_mtime = source.stat().st_mtime
+    return any(not p.exists() or p.stat().st_mtime < source_mtime for p in outputs)
+
+
 def main() -> None:
     geocode_src = project_root / "data" / "reference" / "qgis_grocer_geocode.csv"
 
@@ -106,13 +145,18 @@ def main() -> None:
         if current_csv_path == geocode_src:
             src_df = pd.read_csv(geocode_src)
             work_df = build_working_csv(src_df)
-            work_df.to_csv(audit_csv, index=False)
+            write_if_changed(audit_csv, work_df.to_csv(index=False).encode())
         else:
+            # only re-read after the user has edited the audit csv
             work_df = pd.read_csv(audit_csv)
 
-        gdf = csv_to_geodataframe(audit_csv)
-        gdf.to_file(audit_geojson, driver="GeoJSON")
-        make_folium_map(gdf, audit_html)
+        gdf = dataframe_to_geodataframe(work_df)
+
+        # the geojson and map only need redoing when the audit csv is newer
+        # than them (first run, rebuilt from source, or edited by hand)
+        if is_stale((audit_geojson, audit_html), audit_csv):
+            gdf.to_file(audit_geojson, driver="GeoJSON", engine="pyogrio")
+            make_folium_map(gdf, audit_html)
 
         print()
         print("grocer audit files written:")
@@ -126,7 +170,7 @@ def main() -> None:
 
         if ans == "y":
             gdf.to_csv(final_csv, index=False)
-            gdf.to_file(final_geojson, driver="GeoJSON")
+            gdf.to_file(final_geojson, driver="GeoJSON", engine="pyogrio")
             print()
             print("final grocers written to:")
             print(f"  {final_csv}")
@@ -1,5 +1,6 @@
 # scripts/parcel_classification_report.py
 
+import io
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -35,43 +36,67 @@ RENTED_CODES = [
 
 DEFAULT_TENURE = 'rented'
 
+CLASSIFICATION_BY_CODE = {
+    **{code: 'OWNED' for code in OWNED_CODES},
+    **{code: 'RENTED' for code in RENTED_CODES},
+}
+DEFAULT_CLASSIFICATION = 'RENTED (default)'
+
+# Only these raw columns are used; use codes repeat across every parcel
+PARCEL_COLS = ['Roll Number', 'Property Use Code', 'Dwelling Units']
+PARCEL_DTYPES = {'Roll Number': 'int64', 'Property Use Code': 'category'}
+
+# Fixed-width layout of one property code row in the detail tables
+ROW_FORMATTERS = {
+    'code': '{:<45}'.format,
+    'parcels': '{:>10,.0f}'.format,
+    'total_units': '{:>12,.0f}'.format,
+    'pct_units': '{:>7.1f}%'.format,
+    'avg_units': '{:>8.1f}'.format,
+}
+
+
+def format_code_rows(section: pd.DataFrame) -> list[str]:
+    """Format a slice of the per-code analysis as report lines in one to_string call."""
+    if section.empty:
+        return []
+    table = section.reset_index(names='code')[list(ROW_FORMATTERS)]
+    return table.to_string(header=False, index=False, formatters=ROW_FORMATTERS).split('\n')
+
 
 def generate_report(parcels_path: Path, output_path: Path) -> None:
     """
     Generate a formatted classification report for defensibility documentation.
     """
     # Load data
-    df = pd.read_csv(parcels_path, low_memory=False)
+    df = pd.read_csv(parcels_path, usecols=PARCEL_COLS, dtype=PARCEL_DTYPES)
     df['DU_clean'] = pd.to_numeric(df['Dwelling Units'], errors='coerce')
-    residential = df[df['DU_clean'] > 0].copy()
-    
-    # Analyze by property code
-    analysis = residential.groupby('Property Use Code').agg({
-        'Roll Number': 'count',
-        'DU_clean': 'sum'
-    }).rename(columns={'Roll Number': 'parcels', 'DU_clean': 'total_units'})
-    
-    analysis['pct_units'] = (analysis['total_units'] / analysis['total_units'].sum() * 100)
-    analysis['avg_units'] = (analysis['total_units'] / analysis['parcels'])
-    analysis = analysis.sort_values('total_units', ascending=False)
-    
-    # Classify codes
-    def classify(code):
-        if code in OWNED_CODES:
-            return 'OWNED'
-        elif code in RENTED_CODES:
-            return 'RENTED'
-        else:
-            return 'RENTED (default)'
-    
-    analysis['classification'] = analysis.index.map(classify)
+    residential = df[df['DU_clean'] > 0]
+    
+    # Analyze by property code in one named-aggregation pass. observed=True
+    # so codes with no residential parcels don't show up as empty
+    # categories; group order doesn't matter since we sort by units below
+    analysis = residential.groupby('Property Use Code', observed=True, sort=False).agg(
+        parcels=('Roll Number', 'size'),
+        total_units=('DU_clean', 'sum'),
+    )
+    
+    units = analysis['total_units'].to_numpy()
+    analysis['pct_units'] = units / units.sum() * 100
+    analysis['avg_units'] = units / analysis['parcels'].to_numpy()
+    analysis = analysis.sort_values('total_units', ascending=False, kind='stable')
+    
+    # Classify codes with one dict lookup each, unlisted codes default
+    analysis['classification'] = (
+        analysis.index.astype(str).map(CLASSIFICATION_BY_CODE).fillna(DEFAULT_CLASSIFICATION)
+    )
     
     # Calculate summary statistics
     total_parcels = analysis['parcels'].sum()
     total_units = analysis['total_units'].sum()
     
     owned_df = analysis[analysis['classification'] == 'OWNED']
-    rented_df = analysis[analysis['classification'].str.startswith('RENTED')]
+    rented_df = analysis[analysis['classification'].isin(['RENTED', DEFAULT_CLASSIFICATION])]
     
     owned_units = owned_df['total_units'].sum()
     rented_units = rented_df['total_units'].sum()
@@ -79,117 +104,101 @@ def generate_report(parcels_path: Path, output_path: Path) -> None:
     owned_parcels = owned_df['parcels'].sum()
     rented_parcels = rented_df['parcels'].sum()
     
-    # Generate report
-    report_lines = []
-    report_lines.append("=" * 100)
-    report_lines.append("WINNIPEG PARCEL CLASSIFICATION REPORT")
-    report_lines.append("Property Use Code to Household Tenure Mapping")
-    report_lines.append("=" * 100)
-    report_lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report_lines.append(f"Data Source: {parcels_path.name}")
-    report_lines.append("")
-    
-    # Executive Summary
-    report_lines.append("EXECUTIVE SUMMARY")
-    report_lines.append("-" * 100)
-    report_lines.append(f"Total Residential Parcels:     {total_parcels:>10,}")
-    report_lines.append(f"Total Dwelling Units:          {total_units:>10,.0f}")
-    report_lines.append("")
-    report_lines.append(f"Classified as OWNED:           {owned_units:>10,.0f} units ({owned_units/total_units*100:>5.1f}%)")
-    report_lines.append(f"                               {owned_parcels:>10,} parcels ({owned_parcels/total_parcels*100:>5.1f}%)")
-    report_lines.append("")
-    report_lines.append(f"Classified as RENTED:          {rented_units:>10,.0f} units ({rented_units/total_units*100:>5.1f}%)")
-    report_lines.append(f"                               {rented_parcels:>10,} parcels ({rented_parcels/total_parcels*100:>5.1f}%)")
-    report_lines.append("")
-    report_lines.append("Note: Classification based on expected household tenure behavior patterns, using")
-    report_lines.append("      property type as a proxy. 'Owned' represents single-family and owner-occupied")
-    report_lines.append("      housing. 'Rented' includes apartments, condos, and multi-family conversions.")
-    report_lines.append("")
-    report_lines.append("")
-    
-    # Detailed Classification
-    report_lines.append("DETAILED CLASSIFICATION BY PROPERTY USE CODE")
-    report_lines.append("-" * 100)
-    report_lines.append("")
-    
-    # OWNED category
-    report_lines.append("OWNED CLASSIFICATION")
-    report_lines.append(f"{'Property Use Code':<45} {'Parcels':>10} {'Units':>12} {'% Units':>8} {'Avg DU':>8}")
-    report_lines.append("-" * 100)
-    
-    for code in OWNED_CODES:
-        if code in analysis.index:
-            row = analysis.loc[code]
-            report_lines.append(
-                f"{code:<45} {row['parcels']:>10,.0f} {row['total_units']:>12,.0f} "
-                f"{row['pct_units']:>7.1f}% {row['avg_units']:>8.1f}"
-            )
-    
-    report_lines.append("-" * 100)
-    report_lines.append(f"{'TOTAL OWNED':<45} {owned_parcels:>10,} {owned_units:>12,.0f} {owned_units/total_units*100:>7.1f}%")
-    report_lines.append("")
-    report_lines.append("")
-    
-    # RENTED category
-    report_lines.append("RENTED CLASSIFICATION")
-    report_lines.append(f"{'Property Use Code':<45} {'Parcels':>10} {'Units':>12} {'% Units':>8} {'Avg DU':>8}")
-    report_lines.append("-" * 100)
-    
-    for code in RENTED_CODES:
-        if code in analysis.index:
-            row = analysis.loc[code]
-            report_lines.append(
-                f"{code:<45} {row['parcels']:>10,.0f} {row['total_units']:>12,.0f} "
-                f"{row['pct_units']:>7.1f}% {row['avg_units']:>8.1f}"
-            )
-    
-    report_lines.append("")
-    report_lines.append("OTHER (Defaulted to RENTED)")
-    report_lines.append("-" * 100)
-    
-    other_df = analysis[analysis['classification'] == 'RENTED (default)']
-    for code in other_df.index:
-        row = other_df.loc[code]
-        report_lines.append(
-            f"{code:<45} {row['parcels']:>10,.0f} {row['total_units']:>12,.0f} "
-            f"{row['pct_units']:>7.1f}% {row['avg_units']:>8.1f}"
-        )
-    
-    report_lines.append("-" * 100)
-    report_lines.append(f"{'TOTAL RENTED (incl. default)':<45} {rented_parcels:>10,} {rented_units:>12,.0f} {rented_units/total_units*100:>7.1f}%")
-    report_lines.append("")
-    report_lines.append("")
-    
-    # Methodology note
-    report_lines.append("METHODOLOGY")
-    report_lines.append("-" * 100)
-    report_lines.append("Classification Rationale:")
-    report_lines.append("")
-    report_lines.append("1. OWNED classification includes single-family detached homes, side-by-side duplexes,")
-    report_lines.append("   row housing, and similar property types typically owner-occupied.")
-    report_lines.append("")
-    report_lines.append("2. RENTED classification includes apartment buildings, condo apartments (due to high")
-    report_lines.append("   investor ownership rates), multi-family conversions, and commercial mixed-use buildings.")
-    report_lines.append("")
-    report_lines.append("3. Property codes representing <0.2% of dwelling units are defaulted to RENTED classification")
-    report_lines.append("   as a conservative assumption, since these are predominantly non-standard residential uses")
-    report_lines.append("   (e.g., group care facilities, rooming houses, live-work spaces).")
-    report_lines.append("")
-    report_lines.append("4. This classification enables application of CMHC household size distributions by tenure,")
-    report_lines.append("   reflecting empirical patterns where owner households average 2.7 persons and renter")
-    report_lines.append("   households average 2.1 persons (CMHC 2021).")
-    report_lines.append("")
-    report_lines.append("5. The resulting ~60/40 owned/rented split aligns closely with Winnipeg's 63.1% city-wide")
-    report_lines.append("   ownership rate (CMHC 2021), providing external validation of the classification approach.")
-    report_lines.append("")
-    report_lines.append("=" * 100)
-    
-    # Write report
-    report_text = "\n".join(report_lines)
-    
-    with open(output_path, 'w') as f:
-        f.write(report_text)
-    
+    # Generate report into a buffer, written out in one go at the end
+    with io.StringIO() as out:
+        print("=" * 100, file=out)
+        print("WINNIPEG PARCEL CLASSIFICATION REPORT", file=out)
+        print("Property Use Code to Household Tenure Mapping", file=out)
+        print("=" * 100, file=out)
+        print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", file=out)
+        print(f"Data Source: {parcels_path.name}", file=out)
+        print(file=out)
+
+        # Executive Summary
+        print("EXECUTIVE SUMMARY", file=out)
+        print("-" * 100, file=out)
+        print(f"Total Residential Parcels:     {total_parcels:>10,}", file=out)
+        print(f"Total Dwelling Units:          {total_units:>10,.0f}", file=out)
+        print(file=out)
+        print(f"Classified as OWNED:           {owned_units:>10,.0f} units ({owned_units/total_units*100:>5.1f}%)", file=out)
+        print(f"                               {owned_parcels:>10,} parcels ({owned_parcels/total_parcels*100:>5.1f}%)", file=out)
+        print(file=out)
+        print(f"Classified as RENTED:          {rented_units:>10,.0f} units ({rented_units/total_units*100:>5.1f}%)", file=out)
+        print(f"                               {rented_parcels:>10,} parcels ({rented_parcels/total_parcels*100:>5.1f}%)", file=out)
+        print(file=out)
+        print("Note: Classification based on expected household tenure behavior patterns, using", file=out)
+        print("      property type as a proxy. 'Owned' represents single-family and owner-occupied", file=out)
+        print("      housing. 'Rented' includes apartments, condos, and multi-family conversions.", file=out)
+        print(file=out)
+        print(file=out)
+
+        # Detailed Classification
+        print("DETAILED CLASSIFICATION BY PROPERTY USE CODE", file=out)
+        print("-" * 100, file=out)
+        print(file=out)
+
+        # OWNED category
+        print("OWNED CLASSIFICATION", file=out)
+        print(f"{'Property Use Code':<45} {'Parcels':>10} {'Units':>12} {'% Units':>8} {'Avg DU':>8}", file=out)
+        print("-" * 100, file=out)
+
+        out.writelines(f"{line}\n" for line in format_code_rows(
+            analysis.loc[[code for code in OWNED_CODES if code in analysis.index]]
+        ))
+
+        print("-" * 100, file=out)
+        print(f"{'TOTAL OWNED':<45} {owned_parcels:>10,} {owned_units:>12,.0f} {owned_units/total_units*100:>7.1f}%", file=out)
+        print(file=out)
+        print(file=out)
+
+        # RENTED category
+        print("RENTED CLASSIFICATION", file=out)
+        print(f"{'Property Use Code':<45} {'Parcels':>10} {'Units':>12} {'% Units':>8} {'Avg DU':>8}", file=out)
+        print("-" * 100, file=out)
+
+        out.writelines(f"{line}\n" for line in format_code_rows(
+            analysis.loc[[code for code in RENTED_CODES if code in analysis.index]]
+        ))
+
+        print(file=out)
+        print("OTHER (Defaulted to RENTED)", file=out)
+        print("-" * 100, file=out)
+
+        other_df = analysis[analysis['classification'] == DEFAULT_CLASSIFICATION]
+        out.writelines(f"{line}\n" for line in format_code_rows(other_df))
+
+        print("-" * 100, file=out)
+        print(f"{'TOTAL RENTED (incl. default)':<45} {rented_parcels:>10,} {rented_units:>12,.0f} {rented_units/total_units*100:>7.1f}%", file=out)
+        print(file=out)
+        print(file=out)
+
+        # Methodology note
+        print("METHODOLOGY", file=out)
+        print("-" * 100, file=out)
+        print("Classification Rationale:", file=out)
+        print(file=out)
+        print("1. OWNED classification includes single-family detached homes, side-by-side duplexes,", file=out)
+        print("   row housing, and similar property types typically owner-occupied.", file=out)
+        print(file=out)
+        print("2. RENTED classification includes apartment buildings, condo apartments (due to high", file=out)
+        print("   investor ownership rates), multi-family conversions, and commercial mixed-use buildings.", file=out)
+        print(file=out)
+        print("3. Property codes representing <0.2% of dwelling units are defaulted to RENTED classification", file=out)
+        print("   as a conservative assumption, since these are predominantly non-standard residential uses", file=out)
+        print("   (e.g., group care facilities, rooming houses, live-work spaces).", file=out)
+        print(file=out)
+        print("4. This classification enables application of CMHC household size distributions by tenure,", file=out)
+        print("   reflecting empirical patterns where owner households average 2.7 persons and renter", file=out)
+        print("   households average 2.1 persons (CMHC 2021).", file=out)
+        print(file=out)
+        print("5. The resulting ~60/40 owned/rented split aligns closely with Winnipeg's 63.1% city-wide", file=out)
+        print("   ownership rate (CMHC 2021), providing external validation of the classification approach.", file=out)
+        print(file=out)
+        print("=" * 100, file=out)
+
+        # one write of the finished report
+        output_path.write_text(out.getvalue(), encoding='utf-8')
+
     print(f"Report generated: {output_path}")
     print(f"\nSummary:")
     print(f"  Total dwelling units: {total_units:,.0f}")
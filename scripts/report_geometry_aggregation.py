@@ -1,5 +1,6 @@
 # scripts/report_geometry_aggregation.py
 
+import io
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -14,24 +15,37 @@ if str(src_path) not in sys.path:
 from food_desert import paths  # noqa: F401
 
 
+def write_distribution(f, values: pd.Series) -> None:
+    """Write the min/quartiles/max/mean block for a column, quantiles in one call."""
+    q_min, q25, q50, q75, q_max = values.quantile([0.0, 0.25, 0.5, 0.75, 1.0]).to_numpy()
+    f.write(f"  Minimum:      {q_min:>8.0f}\n")
+    f.write(f"  25th %ile:    {q25:>8.0f}\n")
+    f.write(f"  Median:       {q50:>8.0f}\n")
+    f.write(f"  75th %ile:    {q75:>8.0f}\n")
+    f.write(f"  Maximum:      {q_max:>8.0f}\n")
+    f.write(f"  Mean:         {values.mean():>8.1f}\n")
+
+
 def main() -> None:
-    mask_path = project_root / "data" / "interim" / "parcel_residents_mask.csv"
-    agg_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.csv"
+    mask_path = project_root / "data" / "interim" / "parcel_residents_mask.parquet"
+    agg_path = project_root / "data" / "processed" / "aggregated_parcels_by_geometry.parquet"
     output_path = project_root / "outputs" / "reports" / "geometry_aggregation_report.txt"
     
-    mask = pd.read_csv(mask_path)
-    agg = pd.read_csv(agg_path)
+    # only totals come from the mask; the aggregate is read whole because
+    # the column retention section inspects every column
+    mask = pd.read_parquet(mask_path, columns=['residents', 'Dwelling Units'])
+    agg = pd.read_parquet(agg_path)
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path, 'w') as f:
+    with io.StringIO() as f:
         # Header
         f.write("=" * 100 + "\n")
         f.write("WINNIPEG PARCEL GEOMETRY AGGREGATION REPORT\n")
         f.write("Residential Parcels Grouped by Identical Geographic Location\n")
         f.write("=" * 100 + "\n")
         f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Data Sources: parcel_residents_mask.csv, Assessment_Parcels_20251112.csv\n\n")
+        f.write(f"Data Sources: parcel_residents_mask.parquet, Assessment_Parcels_20251112.csv\n\n")
         
         # Executive Summary
         f.write("EXECUTIVE SUMMARY\n")
@@ -80,12 +94,7 @@ def main() -> None:
         
         f.write("Resident Distribution (Aggregated):\n")
         f.write("-" * 100 + "\n")
-        f.write(f"  Minimum:      {agg['residents'].min():>8.0f}\n")
-        f.write(f"  25th %ile:    {agg['residents'].quantile(0.25):>8.0f}\n")
-        f.write(f"  Median:       {agg['residents'].median():>8.0f}\n")
-        f.write(f"  75th %ile:    {agg['residents'].quantile(0.75):>8.0f}\n")
-        f.write(f"  Maximum:      {agg['residents'].max():>8.0f}\n")
-        f.write(f"  Mean:         {agg['residents'].mean():>8.1f}\n")
+        write_distribution(f, agg['residents'])
         
         # Dwelling Units Statistics
         f.write("\n" + "=" * 100 + "\n")
@@ -97,12 +106,7 @@ def main() -> None:
         
         f.write("Dwelling Units Distribution (Aggregated):\n")
         f.write("-" * 100 + "\n")
-        f.write(f"  Minimum:      {agg['Dwelling Units'].min():>8.0f}\n")
-        f.write(f"  25th %ile:    {agg['Dwelling Units'].quantile(0.25):>8.0f}\n")
-        f.write(f"  Median:       {agg['Dwelling Units'].median():>8.0f}\n")
-        f.write(f"  75th %ile:    {agg['Dwelling Units'].quantile(0.75):>8.0f}\n")
-        f.write(f"  Maximum:      {agg['Dwelling Units'].max():>8.0f}\n")
-        f.write(f"  Mean:         {agg['Dwelling Units'].mean():>8.1f}\n")
+        write_distribution(f, agg['Dwelling Units'])
         
         # Column Retention
         f.write("\n" + "=" * 100 + "\n")
@@ -136,13 +140,13 @@ def main() -> None:
             if col in agg.columns:
                 display_cols.append(col)
         
-        top10 = agg.nlargest(10, 'residents')[display_cols].copy()
+        top10 = agg.nlargest(10, 'residents')[display_cols]
         
         # Format for better display
-        top10['residents'] = top10['residents'].apply(lambda x: f"{x:,.0f}")
-        top10['Dwelling Units'] = top10['Dwelling Units'].apply(lambda x: f"{x:,.0f}")
-        
-        f.write(top10.to_string(index=False) + "\n")
+        thousands = "{:,.0f}".format
+        f.write(top10.to_string(
+            index=False, formatters={'residents': thousands, 'Dwelling Units': thousands}
+        ) + "\n")
         
         f.write("\n" + "=" * 100 + "\n")
         f.write("METHODOLOGY\n")
@@ -160,6 +164,9 @@ def main() -> None:
         f.write("         parcels (e.g., individual condo units) while preserving total population counts.\n\n")
         
         f.write("=" * 100 + "\n")
+
+        # one write of the finished report
+        output_path.write_text(f.getvalue(), encoding='utf-8')
     
     print(f"Report written to: {output_path}")
 
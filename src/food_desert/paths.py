@@ -2,26 +2,36 @@ from pathlib import Path
 
 project_root = Path(__file__).resolve().parents[2]
 
+# built once at import, the functions below just hand these back
+_RAW = project_root / "data" / "raw"
+_INTERIM = project_root / "data" / "interim"
+_PROCESSED = project_root / "data" / "processed"
+_REFERENCE = project_root / "data" / "reference"
+_OUTPUTS = project_root / "outputs"
+_RASTERS = _OUTPUTS / "rasters"
+_REPORTS = _OUTPUTS / "reports"
+_LOGS = project_root / "logs"
+
 def raw() -> Path:
-    return project_root / "data" / "raw"
+    return _RAW
 
 def interim() -> Path:
-    return project_root / "data" / "interim"
+    return _INTERIM
 
 def processed() -> Path:
-    return project_root / "data" / "processed"
+    return _PROCESSED
 
 def reference() -> Path:
-    return project_root / "data" / "reference"
+    return _REFERENCE
 
 def rasters() -> Path:
-    return project_root / "outputs" / "rasters"
+    return _RASTERS
 
 def logs() -> Path:
-    return project_root / "logs"
+    return _LOGS
 
 def reports() -> Path:
-    return project_root / "outputs" /  "reports"
+    return _REPORTS
 
 def outputs() -> Path:
-    return project_root / "outputs"
\ No newline at end of file
+    return _OUTPUTS